@@ -0,0 +1,598 @@
+"""Нагрузочное тестирование бота на локальном фейковом Bot API.
+
+Бот запускается отдельным процессом через bot.main() (или с вебхуком на
+тех же обработчиках), но все запросы к Telegram уходят на фейковый сервер
+из loadtest/fake_bot_api.py. Виртуальные пользователи параллельно шлют фото,
+видео и видео-кружки, а в конце печатается отчёт с задержками, пропускной
+способностью, ошибками и пиковым потреблением ресурсов.
+
+Пример:
+    python load_test.py --users 20 --jobs-per-user 5 --mix photo=6,video=3,video_note=1
+
+Для замера CPU и памяти процесса бота нужен psutil (pip install psutil); он не
+входит в requirements.txt бота, без него в отчёте n/a.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+from loadtest.fake_bot_api import FakeBotAPI, FakeFile, Job, FAKE_TOKEN, RESULT_METHODS
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+WEBHOOK_PATH = "/webhook"
+
+
+@dataclass
+class LoadTestConfig:
+    USERS: int = 10
+    JOBS_PER_USER: int = 3
+    # Доли типов медиа в нагрузке
+    MIX: Dict[str, float] = field(default_factory=lambda: {"photo": 6, "video": 3, "video_note": 1})
+    RAMP_UP: float = 0.0
+    THINK_TIME: float = 0.0
+    JOB_TIMEOUT: float = 300.0
+    STARTUP_TIMEOUT: float = 60.0
+    MODE: str = "polling"
+    SEED: int = 0
+    SAMPLE_INTERVAL: float = 0.5
+    # Параметры тестовых файлов
+    PHOTO_SIZE: tuple = (1280, 720)
+    VIDEO_SIZE: tuple = (1280, 720)
+    VIDEO_NOTE_SIZE: int = 384
+    VIDEO_DURATION: float = 5.0
+    VIDEO_FPS: int = 30
+    VIDEO_AUDIO: bool = True
+
+
+@dataclass
+class ResourcePeaks:
+    rss_mb: Optional[float] = None
+    cpu_percent: Optional[float] = None
+    avg_cpu_percent: Optional[float] = None
+    processes: Optional[int] = None
+    disk_mb: float = 0.0
+
+
+# --- Тестовые файлы ---
+
+def _write_video(path: str, size: tuple, duration: float, fps: int, audio: bool):
+    """Создание тестового видео с движущейся картинкой и, при необходимости, звуком"""
+    import cv2
+    import numpy as np
+
+    width, height = size
+    silent_path = path.replace('.mp4', '_silent.mp4') if audio else path
+    out = cv2.VideoWriter(silent_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(int(duration * fps)):
+        frame = np.roll(background, i * 4, axis=1)
+        cv2.circle(frame, (i * 8 % width, height // 2), min(width, height) // 8, (0, 0, 255), -1)
+        out.write(frame)
+    out.release()
+
+    if audio:
+        from moviepy.editor import VideoFileClip, AudioClip
+
+        clip = VideoFileClip(silent_path)
+        tone = AudioClip(lambda t: np.sin(440 * 2 * np.pi * t), duration=clip.duration, fps=44100)
+        clip.set_audio(tone).write_videofile(path, codec='libx264', audio_codec='aac', logger=None)
+        clip.close()
+        os.remove(silent_path)
+
+
+def generate_fixtures(directory: str, config: LoadTestConfig) -> Dict[str, FakeFile]:
+    """Генерация тестовых фото, видео и видео-кружка"""
+    from PIL import Image
+    import numpy as np
+
+    fixtures = {}
+    if config.MIX.get("photo"):
+        path = os.path.join(directory, "photo.jpg")
+        width, height = config.PHOTO_SIZE
+        pixels = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(path, quality=90)
+        fixtures["photo"] = FakeFile("photo", path, os.path.getsize(path), "photo")
+
+    if config.MIX.get("video"):
+        path = os.path.join(directory, "video.mp4")
+        _write_video(path, config.VIDEO_SIZE, config.VIDEO_DURATION, config.VIDEO_FPS, config.VIDEO_AUDIO)
+        fixtures["video"] = FakeFile("video", path, os.path.getsize(path), "video")
+
+    if config.MIX.get("video_note"):
+        path = os.path.join(directory, "video_note.mp4")
+        size = (config.VIDEO_NOTE_SIZE, config.VIDEO_NOTE_SIZE)
+        _write_video(path, size, config.VIDEO_DURATION, config.VIDEO_FPS, config.VIDEO_AUDIO)
+        fixtures["video_note"] = FakeFile("video_note", path, os.path.getsize(path), "video_note")
+
+    return fixtures
+
+
+def _media_attrs(media_type: str, config: LoadTestConfig) -> dict:
+    duration = int(math.ceil(config.VIDEO_DURATION))
+    if media_type == "photo":
+        width, height = config.PHOTO_SIZE
+        return {"width": width, "height": height}
+    if media_type == "video":
+        width, height = config.VIDEO_SIZE
+        return {"width": width, "height": height, "duration": duration, "mime_type": "video/mp4"}
+    return {"length": config.VIDEO_NOTE_SIZE, "duration": duration}
+
+
+# --- Процесс бота ---
+
+def run_bot(api_url: str, mode: str, webhook_port: int):
+    """Запуск настоящего бота с перенаправлением запросов на фейковый API"""
+    from aiogram.bot import api
+    from config import BOT
+
+    # Без этих констант подмена адреса молча не сработает и запросы уйдут в настоящий Telegram
+    for name in ('API_URL', 'FILE_URL'):
+        if not hasattr(api, name):
+            raise RuntimeError(f"В aiogram.bot.api нет {name}, перенаправить запросы на фейковый API нельзя")
+
+    api.API_URL = api_url + "/bot{token}/{method}"
+    api.FILE_URL = api_url + "/file/bot{token}/{path}"
+    # Настоящий токен не должен покидать процесс даже при ошибке настройки
+    BOT.TOKEN = FAKE_TOKEN
+
+    import bot
+
+    if mode == "polling":
+        bot.main()
+        return
+
+    from aiogram import Bot, Dispatcher, executor
+    from aiogram.contrib.fsm_storage.memory import MemoryStorage
+    from aiohttp import web
+    from handlers.media_handlers import register_handlers
+
+    bot.setup_logging()
+    dp = Dispatcher(Bot(token=BOT.TOKEN), storage=MemoryStorage())
+    register_handlers(dp)
+
+    webhook = executor.set_webhook(
+        dp,
+        WEBHOOK_PATH,
+        skip_updates=True,
+        on_startup=bot.on_startup,
+        on_shutdown=bot.on_shutdown,
+    )
+    # executor.start_webhook() в новых aiohttp запускает приложение в новом цикле событий,
+    # а сессия бота уже привязана к циклу исполнителя, поэтому сервер поднимается вручную
+    loop = webhook.loop
+    runner = web.AppRunner(webhook.web_app)
+    try:
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', webhook_port).start())
+        # Вебхук регистрируется, только когда сервер уже принимает запросы
+        loop.run_until_complete(dp.bot.set_webhook(f"http://127.0.0.1:{webhook_port}{WEBHOOK_PATH}"))
+        loop.run_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        loop.run_until_complete(runner.cleanup())
+
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _stop_process(process: subprocess.Popen, timeout: float = 15.0):
+    """Остановка бота так же, как по Ctrl+C, с принудительным завершением при зависании"""
+    if process.poll() is not None:
+        return
+    if os.name == 'nt':
+        process.terminate()
+    else:
+        process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        logging.warning("Бот не остановился вовремя, завершаю принудительно")
+        process.kill()
+        process.wait()
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _bot_files_size(bot_dir: str) -> int:
+    """Размер рабочих папок бота (downloads, temp) без логов, лежащих в корне"""
+    return sum(_dir_size(entry.path) for entry in os.scandir(bot_dir) if entry.is_dir())
+
+
+async def monitor_resources(pid: int, bot_dir: str, interval: float, peaks: ResourcePeaks, stop: asyncio.Event):
+    """Периодический замер ресурсов процесса бота и его дочерних процессов (ffmpeg)"""
+    processes = {}
+    cpu_samples = []
+    root = None
+    if psutil is None:
+        logging.warning("psutil не установлен, CPU и память бота не замеряются")
+    else:
+        try:
+            root = psutil.Process(pid)
+        except psutil.Error:
+            # Бот уже завершился, падение обработает watch_process
+            return
+
+    while not stop.is_set():
+        peaks.disk_mb = max(peaks.disk_mb, _bot_files_size(bot_dir) / 1024 ** 2)
+
+        if root is not None:
+            try:
+                tree = [root] + root.children(recursive=True)
+            except psutil.Error:
+                break
+            rss = 0
+            cpu = 0.0
+            for proc in tree:
+                # Один объект на pid, иначе cpu_percent всегда возвращает 0
+                proc = processes.setdefault(proc.pid, proc)
+                try:
+                    rss += proc.memory_info().rss
+                    cpu += proc.cpu_percent(None)
+                except psutil.Error:
+                    continue
+            cpu_samples.append(cpu)
+            peaks.rss_mb = max(peaks.rss_mb or 0.0, rss / 1024 ** 2)
+            peaks.cpu_percent = max(peaks.cpu_percent or 0.0, cpu)
+            peaks.avg_cpu_percent = sum(cpu_samples) / len(cpu_samples)
+            peaks.processes = max(peaks.processes or 0, len(tree))
+
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def watch_process(process: subprocess.Popen, api: FakeBotAPI, exited: asyncio.Event,
+                        interval: float = 0.2):
+    """Слежение за процессом бота: после его падения ждать ответов бессмысленно"""
+    while process.poll() is None:
+        await asyncio.sleep(interval)
+    logging.error(f"Бот завершился с кодом {process.returncode}")
+    api.fail_pending(f"Бот завершился (код {process.returncode})")
+    exited.set()
+
+
+# --- Нагрузка ---
+
+async def simulate_user(api: FakeBotAPI, user_id: int, config: LoadTestConfig,
+                        fixtures: Dict[str, FakeFile], rng: random.Random, bot_exited: asyncio.Event):
+    """Пользователь отправляет файлы по одному, дожидаясь ответа на каждый"""
+    await asyncio.sleep(rng.uniform(0, config.RAMP_UP) if config.RAMP_UP else 0)
+
+    media_types = list(fixtures)
+    weights = [config.MIX[media_type] for media_type in media_types]
+    for i in range(config.JOBS_PER_USER):
+        if bot_exited.is_set():
+            return
+        media_type = rng.choices(media_types, weights)[0]
+        job = api.submit(user_id, media_type, fixtures[media_type].path, _media_attrs(media_type, config))
+        try:
+            await asyncio.wait_for(job.done.wait(), config.JOB_TIMEOUT)
+        except asyncio.TimeoutError:
+            job.finish(error="Таймаут")
+        if config.THINK_TIME and i < config.JOBS_PER_USER - 1:
+            await asyncio.sleep(rng.expovariate(1 / config.THINK_TIME))
+
+
+async def run_load_test(config: LoadTestConfig, workdir: str) -> dict:
+    """Запуск фейкового API, бота и нагрузки. Возвращает отчёт"""
+    fixtures_dir = os.path.join(workdir, "fixtures")
+    bot_dir = os.path.join(workdir, "bot")
+    os.makedirs(fixtures_dir)
+    os.makedirs(bot_dir)
+
+    logging.info("Генерация тестовых файлов...")
+    fixtures = await asyncio.get_running_loop().run_in_executor(None, generate_fixtures, fixtures_dir, config)
+
+    api = FakeBotAPI()
+    peaks = ResourcePeaks()
+    stop_monitor = asyncio.Event()
+    bot_exited = asyncio.Event()
+    log_file = process = watcher = None
+    started = finished = time.monotonic()
+    try:
+        await api.start()
+        webhook_port = _free_port()
+        log_file = open(os.path.join(bot_dir, "stdout.log"), "wb")
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--run-bot",
+             "--api-url", api.base_url, "--mode", config.MODE, "--webhook-port", str(webhook_port)],
+            cwd=bot_dir,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+        )
+        watcher = asyncio.ensure_future(watch_process(process, api, bot_exited))
+
+        ready = asyncio.ensure_future(api.ready.wait())
+        await asyncio.wait([ready, watcher], timeout=config.STARTUP_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+        ready.cancel()
+        if bot_exited.is_set():
+            raise RuntimeError(f"Бот завершился при запуске (код {process.returncode}), см. {log_file.name}")
+        if not api.ready.is_set():
+            raise RuntimeError(f"Бот не запустился за {config.STARTUP_TIMEOUT} с, см. {log_file.name}")
+
+        monitor = asyncio.ensure_future(
+            monitor_resources(process.pid, bot_dir, config.SAMPLE_INTERVAL, peaks, stop_monitor))
+        logging.info(f"Бот запущен ({config.MODE}), начинаю нагрузку")
+
+        rng = random.Random(config.SEED)
+        started = time.monotonic()
+        await asyncio.gather(*[
+            simulate_user(api, user_id, config, fixtures, random.Random(rng.random()), bot_exited)
+            for user_id in range(1, config.USERS + 1)
+        ])
+        finished = time.monotonic()
+
+        stop_monitor.set()
+        await monitor
+    finally:
+        stop_monitor.set()
+        # Остановка бота самим тестом не считается падением
+        if watcher is not None:
+            watcher.cancel()
+        if process is not None:
+            await asyncio.get_running_loop().run_in_executor(None, _stop_process, process)
+        if log_file is not None:
+            log_file.close()
+        await api.stop()
+
+    bot_exit_code = process.returncode if bot_exited.is_set() else None
+    return build_report(config, api, fixtures, finished - started, peaks, bot_exit_code)
+
+
+# --- Отчёт ---
+
+def percentile(values: List[float], percent: float) -> Optional[float]:
+    """Перцентиль с линейной интерполяцией"""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _summarize_jobs(jobs: List[Job], duration: float) -> dict:
+    latencies = [job.latency for job in jobs if job.ok]
+    failed = [job for job in jobs if not job.ok]
+    return {
+        "jobs": len(jobs),
+        "ok": len(latencies),
+        "errors": len(failed),
+        "error_rate": len(failed) / len(jobs) if jobs else 0.0,
+        "jobs_per_minute": len(latencies) / duration * 60 if duration else 0.0,
+        "latency": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        },
+    }
+
+
+def build_report(config: LoadTestConfig, api: FakeBotAPI, fixtures: Dict[str, FakeFile],
+                 duration: float, peaks: ResourcePeaks, bot_exit_code: Optional[int] = None) -> dict:
+    jobs = api.jobs
+    errors = Counter(job.error.split(':')[0] for job in jobs if job.error)
+    report = {
+        "config": asdict(config),
+        "duration": duration,
+        "cpu_count": os.cpu_count(),
+        "bot_exit_code": bot_exit_code,
+        "jobs_not_sent": config.USERS * config.JOBS_PER_USER - len(jobs),
+        "total": _summarize_jobs(jobs, duration),
+        "by_type": {
+            media_type: _summarize_jobs([job for job in jobs if job.media_type == media_type], duration)
+            for media_type in RESULT_METHODS if media_type in fixtures
+        },
+        "errors": dict(errors.most_common()),
+        "fixtures_mb": {media_type: f.size / 1024 ** 2 for media_type, f in fixtures.items()},
+        "api_calls": dict(api.calls.most_common()),
+        "unknown_methods": dict(api.unknown_methods),
+        "webhook_errors": api.webhook_errors,
+        "traffic_mb": {"to_bot": api.bytes_sent / 1024 ** 2, "from_bot": api.bytes_received / 1024 ** 2},
+        "resources": asdict(peaks),
+    }
+    return report
+
+
+def _fmt_seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def _fmt_optional(value: Optional[float], unit: str) -> str:
+    return "n/a" if value is None else f"{value:.1f}{unit}"
+
+
+def format_report(report: dict) -> str:
+    config = report["config"]
+    lines = [
+        f"Режим: {config['MODE']}, пользователей: {config['USERS']}, "
+        f"задач на пользователя: {config['JOBS_PER_USER']}, CPU: {report['cpu_count']}",
+        f"Длительность нагрузки: {report['duration']:.1f}s",
+        "",
+        f"{'тип':<12}{'задач':>7}{'ошибок':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'задач/мин':>11}",
+    ]
+    rows = list(report["by_type"].items()) + [("всего", report["total"])]
+    for name, stats in rows:
+        latency = stats["latency"]
+        lines.append(
+            f"{name:<12}{stats['jobs']:>7}{stats['errors']:>8}"
+            f"{_fmt_seconds(latency['p50']):>9}{_fmt_seconds(latency['p95']):>9}"
+            f"{_fmt_seconds(latency['p99']):>9}{_fmt_seconds(latency['max']):>9}"
+            f"{stats['jobs_per_minute']:>11.1f}"
+        )
+
+    lines.append("")
+    if report["bot_exit_code"] is not None:
+        lines.append(f"БОТ УПАЛ во время нагрузки, код завершения: {report['bot_exit_code']}")
+        lines.append(f"Не отправлено задач: {report['jobs_not_sent']}")
+    lines.append(f"Доля ошибок: {report['total']['error_rate']:.1%}")
+    for error, count in report["errors"].items():
+        lines.append(f"  {count} x {error}")
+    if report["unknown_methods"]:
+        lines.append(f"Неизвестные методы API: {report['unknown_methods']}")
+    if report["webhook_errors"]:
+        lines.append(f"Ошибок доставки вебхука: {report['webhook_errors']}")
+
+    resources = report["resources"]
+    lines += [
+        "",
+        f"Пик памяти (RSS): {_fmt_optional(resources['rss_mb'], ' MB')}",
+        f"Пик CPU: {_fmt_optional(resources['cpu_percent'], '%')}, "
+        f"средний CPU: {_fmt_optional(resources['avg_cpu_percent'], '%')}",
+        f"Пик процессов: {resources['processes'] or 'n/a'}",
+        f"Пик временных файлов: {resources['disk_mb']:.1f} MB",
+        f"Трафик: к боту {report['traffic_mb']['to_bot']:.1f} MB, "
+        f"от бота {report['traffic_mb']['from_bot']:.1f} MB",
+    ]
+    return "\n".join(lines)
+
+
+# --- Командная строка ---
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(','):
+        media_type, _, weight = part.partition('=')
+        media_type = media_type.strip()
+        if media_type not in RESULT_METHODS:
+            raise argparse.ArgumentTypeError(f"Неподдерживаемый тип медиа: {media_type}")
+        mix[media_type] = float(weight or 1)
+        if mix[media_type] < 0:
+            raise argparse.ArgumentTypeError(f"Отрицательная доля для {media_type}: {weight}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("В смеси нет ни одной положительной доли")
+    return {media_type: weight for media_type, weight in mix.items() if weight > 0}
+
+
+def _parse_size(value: str) -> tuple:
+    width, _, height = value.lower().partition('x')
+    return int(width), int(height)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    defaults = LoadTestConfig()
+    parser = argparse.ArgumentParser(description="Нагрузочное тестирование бота на фейковом Bot API")
+    parser.add_argument('--users', type=int, default=defaults.USERS, help="Число одновременных пользователей")
+    parser.add_argument('--jobs-per-user', type=int, default=defaults.JOBS_PER_USER,
+                        help="Сколько файлов отправляет каждый пользователь")
+    parser.add_argument('--mix', type=_parse_mix, default=defaults.MIX,
+                        help="Доли типов медиа, например photo=6,video=3,video_note=1")
+    parser.add_argument('--ramp-up', type=float, default=defaults.RAMP_UP,
+                        help="Пользователи стартуют равномерно в течение N секунд (0 - всплеск)")
+    parser.add_argument('--think-time', type=float, default=defaults.THINK_TIME,
+                        help="Средняя пауза пользователя между файлами, секунды")
+    parser.add_argument('--job-timeout', type=float, default=defaults.JOB_TIMEOUT)
+    parser.add_argument('--mode', choices=('polling', 'webhook'), default=defaults.MODE)
+    parser.add_argument('--seed', type=int, default=defaults.SEED)
+    parser.add_argument('--photo-size', type=_parse_size, default=defaults.PHOTO_SIZE, help="Например 1280x720")
+    parser.add_argument('--video-size', type=_parse_size, default=defaults.VIDEO_SIZE, help="Например 1280x720")
+    parser.add_argument('--video-note-size', type=int, default=defaults.VIDEO_NOTE_SIZE)
+    parser.add_argument('--video-duration', type=float, default=defaults.VIDEO_DURATION)
+    parser.add_argument('--video-fps', type=int, default=defaults.VIDEO_FPS)
+    parser.add_argument('--no-audio', action='store_true', help="Тестовые видео без звуковой дорожки")
+    parser.add_argument('--json', help="Сохранить отчёт в JSON-файл")
+    parser.add_argument('--keep-workdir', action='store_true',
+                        help="Не удалять рабочую папку с тестовыми файлами и логами бота")
+    parser.add_argument('--max-error-rate', type=float,
+                        help="Завершиться с кодом 1, если доля ошибок больше (например 0.01)")
+    parser.add_argument('--max-p95', type=float,
+                        help="Завершиться с кодом 1, если p95 задержки больше N секунд")
+    # Внутренний режим: запуск самого бота в дочернем процессе
+    parser.add_argument('--run-bot', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--api-url', help=argparse.SUPPRESS)
+    parser.add_argument('--webhook-port', type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Основная функция нагрузочного теста"""
+    args = parse_args(argv)
+    if args.run_bot:
+        run_bot(args.api_url, args.mode, args.webhook_port)
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = LoadTestConfig(
+        USERS=args.users,
+        JOBS_PER_USER=args.jobs_per_user,
+        MIX=args.mix,
+        RAMP_UP=args.ramp_up,
+        THINK_TIME=args.think_time,
+        JOB_TIMEOUT=args.job_timeout,
+        MODE=args.mode,
+        SEED=args.seed,
+        PHOTO_SIZE=args.photo_size,
+        VIDEO_SIZE=args.video_size,
+        VIDEO_NOTE_SIZE=args.video_note_size,
+        VIDEO_DURATION=args.video_duration,
+        VIDEO_FPS=args.video_fps,
+        VIDEO_AUDIO=not args.no_audio,
+    )
+
+    workdir = tempfile.mkdtemp(prefix="watermark_loadtest_")
+    report = None
+    try:
+        report = asyncio.run(run_load_test(config, workdir))
+    except RuntimeError as e:
+        logging.error(str(e))
+        return 1
+    finally:
+        # Логи бота нужны для разбора неудачного запуска или падения
+        if args.keep_workdir or report is None or report["bot_exit_code"] is not None:
+            logging.info(f"Рабочая папка сохранена: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if report["bot_exit_code"] is not None:
+        return 1
+    total = report["total"]
+    if args.max_error_rate is not None and total["error_rate"] > args.max_error_rate:
+        return 1
+    if args.max_p95 is not None and (total["latency"]["p95"] is None or total["latency"]["p95"] > args.max_p95):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,332 @@
+from aiohttp import web
+import aiohttp
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+FAKE_TOKEN = "123456789:LOADTEST-fake-token"
+
+# Ответы бота, которые считаются завершением задачи
+RESULT_METHODS = {
+    "photo": "sendPhoto",
+    "video": "sendVideo",
+    "video_note": "sendVideoNote",
+}
+# Начало текстов ошибок из обработчиков (handlers/media_handlers.py)
+ERROR_PREFIXES = ("Ошибка", "Произошла ошибка")
+
+
+@dataclass
+class FakeFile:
+    file_id: str
+    path: str
+    size: int
+    media_type: str
+
+    @property
+    def file_path(self) -> str:
+        ext = ".jpg" if self.media_type == "photo" else ".mp4"
+        return f"{self.media_type}s/{self.file_id}{ext}"
+
+
+@dataclass
+class Job:
+    """Одно сообщение пользователя с медиафайлом и его результат"""
+    chat_id: int
+    message_id: int
+    media_type: str
+    submitted_at: float
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.done.is_set() and self.error is None
+
+    @property
+    def latency(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.submitted_at
+
+    def finish(self, error: Optional[str] = None):
+        if self.done.is_set():
+            return
+        self.finished_at = time.monotonic()
+        self.error = error
+        self.done.set()
+
+
+class FakeBotAPI:
+    """Локальная замена Telegram Bot API для нагрузочного тестирования.
+
+    Отдаёт обновления через getUpdates или вебхук, раздаёт файлы и
+    фиксирует ответы бота, по которым считается время обработки задач.
+    """
+
+    BOT_INFO = {
+        "id": 123456789,
+        "is_bot": True,
+        "first_name": "LoadTest",
+        "username": "loadtest_bot",
+    }
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.ready = asyncio.Event()
+        self.calls: Counter = Counter()
+        self.unknown_methods: Counter = Counter()
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.webhook_url: Optional[str] = None
+        self.webhook_errors = 0
+
+        self._closing = False
+        self._files: Dict[str, FakeFile] = {}
+        self._jobs: Dict[tuple, Job] = {}
+        self._pending: List[dict] = []
+        self._new_updates = asyncio.Event()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._webhook_semaphore: Optional[asyncio.Semaphore] = None
+        self._webhook_session: Optional[aiohttp.ClientSession] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def fail_pending(self, error: str):
+        """Завершение с ошибкой всех задач, на которые бот ещё не ответил"""
+        for job in self._jobs.values():
+            job.finish(error=error)
+
+    async def start(self):
+        """Запуск HTTP-сервера"""
+        app = web.Application(client_max_size=1024 ** 3)
+        app.router.add_get("/file/bot{token}/{path:.+}", self._handle_file)
+        app.router.add_route("*", "/bot{token}/{method}", self._handle_method)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        logging.info(f"Фейковый Bot API запущен на {self.base_url}")
+
+    async def stop(self):
+        """Остановка сервера"""
+        # Будим висящие долгие опросы, иначе cleanup ждёт их таймаута
+        self._closing = True
+        self._new_updates.set()
+        if self._webhook_session is not None:
+            await self._webhook_session.close()
+            self._webhook_session = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def submit(self, user_id: int, media_type: str, source_path: str, attrs: Optional[dict] = None) -> Job:
+        """Отправка боту сообщения с медиафайлом от имени пользователя.
+
+        attrs - дополнительные поля медиа (width, height, duration, length)
+        """
+        if media_type not in RESULT_METHODS:
+            raise ValueError(f"Неподдерживаемый тип медиа: {media_type}")
+
+        # У каждого сообщения свой file_id, как у разных файлов в Telegram
+        file_id = f"{media_type}-{next(self._file_ids)}"
+        size = os.path.getsize(source_path)
+        self._files[file_id] = FakeFile(file_id, source_path, size, media_type)
+
+        media = {"file_id": file_id, "file_size": size}
+        media.update(attrs or {})
+        message = self._make_message(user_id, from_user=True)
+        message[media_type] = [media] if media_type == "photo" else media
+
+        job = Job(user_id, message["message_id"], media_type, time.monotonic())
+        self._jobs[(user_id, job.message_id)] = job
+
+        update = {"update_id": next(self._update_ids), "message": message}
+        if self.webhook_url:
+            asyncio.ensure_future(self._deliver_webhook(update))
+        else:
+            self._pending.append(update)
+            self._new_updates.set()
+        return job
+
+    def _make_message(self, chat_id: int, from_user: bool, **extra) -> dict:
+        sender = ({"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"}
+                  if from_user else self.BOT_INFO)
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": f"User{chat_id}"},
+            "from": sender,
+        }
+        message.update(extra)
+        return message
+
+    def _find_job(self, params: dict) -> Optional[Job]:
+        try:
+            key = (int(params["chat_id"]), int(params["reply_to_message_id"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+        return self._jobs.get(key)
+
+    # --- HTTP-обработчики ---
+
+    async def _handle_file(self, request: web.Request) -> web.StreamResponse:
+        file_id = os.path.splitext(os.path.basename(request.match_info["path"]))[0]
+        fake_file = self._files.get(file_id)
+        if fake_file is None:
+            return web.json_response({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+        self.calls["file"] += 1
+        self.bytes_sent += fake_file.size
+        return web.FileResponse(fake_file.path)
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._read_params(request)
+        self.calls[method] += 1
+
+        handler = getattr(self, f"_api_{method}", None)
+        if handler is None:
+            self.unknown_methods[method] += 1
+            logging.warning(f"Неизвестный метод Bot API: {method}")
+            return web.json_response({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+        return web.json_response({"ok": True, "result": await handler(params)})
+
+    async def _read_params(self, request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+
+        params = {}
+        data = await request.post()
+        for key, value in data.items():
+            if isinstance(value, web.FileField):
+                # Файл вычитывается целиком, как его принял бы Telegram
+                self.bytes_received += len(value.file.read())
+                params[key] = value.filename
+            else:
+                params[key] = value
+        params.update(request.query)
+        return params
+
+    # --- Методы Bot API ---
+
+    async def _api_getMe(self, params: dict):
+        return self.BOT_INFO
+
+    async def _api_getWebhookInfo(self, params: dict):
+        return {"url": self.webhook_url or "", "has_custom_certificate": False,
+                "pending_update_count": len(self._pending)}
+
+    async def _api_setWebhook(self, params: dict):
+        self.webhook_url = params.get("url") or None
+        max_connections = int(params.get("max_connections") or 40)
+        self._webhook_semaphore = asyncio.Semaphore(max_connections)
+        if self.webhook_url:
+            pending, self._pending = self._pending, []
+            for update in pending:
+                asyncio.ensure_future(self._deliver_webhook(update))
+            self.ready.set()
+        return True
+
+    async def _api_deleteWebhook(self, params: dict):
+        self.webhook_url = None
+        return True
+
+    async def _api_getUpdates(self, params: dict):
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        if offset < 0:
+            self._pending = self._pending[offset:]
+        elif offset:
+            self._pending = [u for u in self._pending if u["update_id"] >= offset]
+
+        # Долгий опрос с таймаутом больше секунды означает, что бот начал работу
+        if timeout > 1:
+            self.ready.set()
+
+        if not self._pending and timeout and not self._closing:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._pending[:limit]
+
+    async def _api_sendMessage(self, params: dict):
+        text = params.get("text", "")
+        job = self._find_job(params)
+        if job is not None and text.startswith(ERROR_PREFIXES):
+            job.finish(error=text)
+        return self._make_message(int(params["chat_id"]), from_user=False, text=text)
+
+    async def _api_editMessageText(self, params: dict):
+        return self._make_message(int(params["chat_id"]), from_user=False, text=params.get("text", ""))
+
+    async def _api_deleteMessage(self, params: dict):
+        return True
+
+    async def _api_getFile(self, params: dict):
+        fake_file = self._files[params["file_id"]]
+        return {"file_id": fake_file.file_id, "file_size": fake_file.size, "file_path": fake_file.file_path}
+
+    async def _send_media(self, media_type: str, params: dict):
+        job = self._find_job(params)
+        if job is not None:
+            if job.media_type == media_type:
+                job.finish()
+            else:
+                job.finish(error=f"Ожидался {RESULT_METHODS[job.media_type]}, получен {RESULT_METHODS[media_type]}")
+        return self._make_message(int(params["chat_id"]), from_user=False)
+
+    async def _api_sendPhoto(self, params: dict):
+        return await self._send_media("photo", params)
+
+    async def _api_sendVideo(self, params: dict):
+        return await self._send_media("video", params)
+
+    async def _api_sendVideoNote(self, params: dict):
+        return await self._send_media("video_note", params)
+
+    # --- Вебхук ---
+
+    async def _deliver_webhook(self, update: dict):
+        """Доставка обновления на вебхук бота"""
+        if self._webhook_session is None:
+            self._webhook_session = aiohttp.ClientSession()
+
+        async with self._webhook_semaphore:
+            try:
+                async with self._webhook_session.post(
+                    self.webhook_url,
+                    data=json.dumps(update),
+                    headers={"Content-Type": "application/json"},
+                ) as response:
+                    if response.status >= 400:
+                        raise RuntimeError(f"HTTP {response.status}")
+            except Exception as e:
+                self.webhook_errors += 1
+                logging.error(f"Ошибка доставки обновления на вебхук: {str(e)}")
+                message = update["message"]
+                job = self._jobs.get((message["chat"]["id"], message["message_id"]))
+                if job is not None:
+                    job.finish(error=f"Ошибка доставки вебхука: {str(e)}")